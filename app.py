@@ -1,11 +1,26 @@
+import json
+
 import streamlit as st
 import requests
 
 # Configuration
 API_URL = "http://127.0.0.1:8000"
+MAX_MESSAGES = 100  # Chat history kept in session state
+DEBUG_INFO_KEEP = 5  # Most recent messages that keep their retrieval details
+
+# HTTP session kept per browser session, so the keep-alive connection to the backend
+# is reused across reruns without sharing a requests.Session between script threads
+def get_session():
+    if "http_session" not in st.session_state:
+        session = requests.Session()
+        session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        st.session_state.http_session = session
+    return st.session_state.http_session
 
 st.set_page_config(page_title="Mini Agentic RAG for QA", page_icon="🤖")
 
+SESSION = get_session()
+
 # Session State Initialization
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -27,7 +42,7 @@ with st.sidebar:
                 try:
                     # Send file to backend
                     files = {"file": (uploaded_file.name, uploaded_file, "application/pdf")}
-                    response = requests.post(f"{API_URL}/upload", files=files)
+                    response = SESSION.post(f"{API_URL}/upload", files=files)
                     
                     if response.status_code == 200:
                         st.success("Document processed successfully!")
@@ -62,20 +77,32 @@ st.caption("Created by Pallab Chowdhury")
 if not st.session_state.system_ready:
     st.info("Please upload a PDF document to get started!")
 
+def append_message(message):
+    """Append to chat history, bounding its length and dropping old debug info."""
+    messages = st.session_state.messages
+    messages.append(message)
+    if len(messages) > MAX_MESSAGES:
+        del messages[:-MAX_MESSAGES]
+    for old_message in messages[:-DEBUG_INFO_KEEP]:
+        old_message.pop("debug_info", None)
+
+def render_debug_info(debug):
+    """Render retrieval details for an assistant message."""
+    with st.expander("🔍 Retrieval Details"):
+        st.write(f"**Retrieved Chunks:** {debug.get('total_retrieved', 'N/A')}")
+        st.write(f"**Relevant Chunks:** {debug.get('relevant_chunks', 'N/A')}")
+        if "chunk_scores" in debug:
+            st.write("**Chunk Relevance:**")
+            for i, score in enumerate(debug["chunk_scores"], 1):
+                st.write(f"  - Chunk {i}: {score}")
+
 # 1. Display Chat History
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
         # Show debug info if available
-        if debug_mode and message["role"] == "assistant" and "debug_info" in message:
-            with st.expander("🔍 Retrieval Details"):
-                debug = message["debug_info"]
-                st.write(f"**Retrieved Chunks:** {debug.get('total_retrieved', 'N/A')}")
-                st.write(f"**Relevant Chunks:** {debug.get('relevant_chunks', 'N/A')}")
-                if "chunk_scores" in debug:
-                    st.write("**Chunk Relevance:**")
-                    for i, score in enumerate(debug["chunk_scores"], 1):
-                        st.write(f"  - Chunk {i}: {score}")
+        if debug_mode and "debug_info" in message:
+            render_debug_info(message["debug_info"])
 
 # 2. Chat Input - Disabled when system not ready
 if prompt := st.chat_input(
@@ -83,7 +110,7 @@ if prompt := st.chat_input(
     disabled=not st.session_state.system_ready
 ):
     # Add user message to history
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    append_message({"role": "user", "content": prompt})
     with st.chat_message("user"):
         st.markdown(prompt)
 
@@ -91,56 +118,64 @@ if prompt := st.chat_input(
     with st.chat_message("assistant"):
         message_placeholder = st.empty()
         message_placeholder.markdown(" Thinking...")
-        
+
         try:
-            # Call Backend API with debug flag
-            response = requests.post(
+            # Call Backend API with debug flag, streaming the answer as it is generated
+            response = SESSION.post(
                 f"{API_URL}/chat", 
-                json={"question": prompt, "debug": debug_mode}
+                json={"question": prompt, "debug": debug_mode},
+                stream=True
             )
-            
+
             if response.status_code == 200:
-                result = response.json()
-                answer = result.get("answer", "No answer received.")
+                answer = ""
+                result = {}
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data: "):
+                        continue
+                    event = json.loads(line[len("data: "):])
+                    if "delta" in event:
+                        answer += event["delta"]
+                        message_placeholder.markdown(answer + "▌")
+                    elif "error" in event:
+                        answer += f"\n\nError: {event['error']}"
+                    elif event.get("done"):
+                        result = event
+
+                if not answer:
+                    answer = "No answer received."
                 message_placeholder.markdown(answer)
-                
+
                 # Store message with debug info
                 message_data = {"role": "assistant", "content": answer}
-                if debug_mode and "debug_info" in result:
+                if debug_mode and result.get("debug_info"):
                     message_data["debug_info"] = result["debug_info"]
-                
-                st.session_state.messages.append(message_data)
-                
+
+                append_message(message_data)
+
                 # Show debug info immediately if enabled
-                if debug_mode and "debug_info" in result:
-                    with st.expander("Retrieval Details"):
-                        debug = result["debug_info"]
-                        st.write(f"**Retrieved Chunks:** {debug.get('total_retrieved', 'N/A')}")
-                        st.write(f"**Relevant Chunks:** {debug.get('relevant_chunks', 'N/A')}")
-                        if "chunk_scores" in debug:
-                            st.write("**Chunk Relevance:**")
-                            for i, score in enumerate(debug["chunk_scores"], 1):
-                                st.write(f"  - Chunk {i}: {score}")
-                
+                if debug_mode and result.get("debug_info"):
+                    render_debug_info(result["debug_info"])
+
             elif response.status_code == 400:
-                 error_msg = "Please upload a document first."
-                 message_placeholder.markdown(error_msg)
-                 st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                error_msg = "Please upload a document first."
+                message_placeholder.markdown(error_msg)
+                append_message({"role": "assistant", "content": error_msg})
             else:
                 error_msg = f"Error: {response.text}"
                 message_placeholder.markdown(error_msg)
-                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                append_message({"role": "assistant", "content": error_msg})
         except requests.exceptions.ConnectionError:
             error_msg = "Connection Error: Is the backend server running?"
             message_placeholder.markdown(error_msg)
-            st.session_state.messages.append({"role": "assistant", "content": error_msg})
+            append_message({"role": "assistant", "content": error_msg})
         except Exception as e:
             error_msg = f"Unexpected error: {str(e)}"
             message_placeholder.markdown(error_msg)
-            st.session_state.messages.append({"role": "assistant", "content": error_msg})
+            append_message({"role": "assistant", "content": error_msg})
 
 # Add clear chat button
 if st.session_state.messages:
     if st.sidebar.button("Clear Chat History"):
         st.session_state.messages = []
-        st.rerun()
\ No newline at end of file
+        st.rerun()
@@ -1,14 +1,19 @@
+import json
 import requests
 import sys
 
 # API URL
 API_URL = "http://127.0.0.1:8000"
 
+# Reuse one connection pool so each chat turn skips the TCP handshake
+SESSION = requests.Session()
+SESSION.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
 def upload_pdf(file_path):
     print(f"Uploading {file_path}...")
     try:
         with open(file_path, "rb") as f:
-            response = requests.post(f"{API_URL}/upload", files={"file": f})
+            response = SESSION.post(f"{API_URL}/upload", files={"file": f})
         
         if response.status_code == 200:
             print("Upload Success!")
@@ -26,9 +31,19 @@ def chat_loop():
             break
             
         try:
-            response = requests.post(f"{API_URL}/chat", json={"question": question})
+            response = SESSION.post(f"{API_URL}/chat", json={"question": question}, stream=True)
             if response.status_code == 200:
-                print(f"Agent: {response.json()['answer']}")
+                # Print the answer as it streams in
+                print("Agent: ", end="", flush=True)
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data: "):
+                        continue
+                    event = json.loads(line[len("data: "):])
+                    if "delta" in event:
+                        print(event["delta"], end="", flush=True)
+                    elif "error" in event:
+                        print(f"\nError: {event['error']}", end="")
+                print()
             else:
                 print(f"Error: {response.text}")
         except Exception as e:
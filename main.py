@@ -1,16 +1,32 @@
 # Import Standard Libraries
 import os
+import glob
+import asyncio
+import json
 import logging
-from typing import List, Dict, Optional
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from typing import List, Dict, Optional, Tuple, AsyncIterator
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import faiss
+import fitz
+import numpy as np
 
 from fastapi import FastAPI, UploadFile, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 # Import Langchain Components
 from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
@@ -48,22 +64,130 @@ embeddings = AzureOpenAIEmbeddings(
 # Global Vector Store Reference
 vector_store = None
 vector_store_path = "faiss_index"
+# Serializes index builds and saves across concurrent uploads
+ingest_lock = threading.Lock()
+
+# HNSW graph parameters (neighbours per node, build-time and query-time beam width)
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# Semantic Response Cache
+# Past question embeddings -> answers for the currently loaded document.
+SEMANTIC_CACHE_THRESHOLD = 0.92  # Minimum cosine similarity for a cache hit
+SEMANTIC_CACHE_TTL = 3600  # Seconds before a cached answer goes stale
+SEMANTIC_CACHE_MAX_ENTRIES = 1000  # Evict expired/oldest entries beyond this
+cache_index = None
+cache_answers: List[str] = []
+cache_timestamps: List[float] = []
+# Bumped on every reset so answers computed against a replaced document are not cached
+cache_generation = 0
+# Guards the cache: it is reset from the ingest thread and used from the event loop.
+# Reentrant so ingest_pdf can reset the cache and publish the new store in one step.
+cache_lock = threading.RLock()
+
+def reset_semantic_cache():
+    """Drop all cached answers, e.g. when a new document is ingested."""
+    global cache_index, cache_generation
+    with cache_lock:
+        cache_index = None
+        cache_answers.clear()
+        cache_timestamps.clear()
+        cache_generation += 1
+
+def lookup_semantic_cache(query_vector: np.ndarray) -> Optional[str]:
+    """Return a fresh cached answer for a similar question, if any."""
+    with cache_lock:
+        if cache_index is None or cache_index.ntotal == 0:
+            return None
+        
+        similarities, ids = cache_index.search(query_vector, min(5, cache_index.ntotal))
+        now = time.time()
+        for similarity, idx in zip(similarities[0], ids[0]):
+            if similarity < SEMANTIC_CACHE_THRESHOLD:
+                break
+            if now - cache_timestamps[idx] <= SEMANTIC_CACHE_TTL:
+                logger.info(f"Semantic cache hit (similarity={similarity:.3f})")
+                return cache_answers[idx]
+        return None
+
+def _evict_semantic_cache():
+    """
+    Rebuild the cache index from unexpired entries, keeping the newest 3/4 of
+    SEMANTIC_CACHE_MAX_ENTRIES. Caller must hold cache_lock.
+    """
+    global cache_index
+    now = time.time()
+    # Entries are appended in time order, so the tail is the newest
+    keep = [i for i, ts in enumerate(cache_timestamps) if now - ts <= SEMANTIC_CACHE_TTL]
+    keep = keep[-(SEMANTIC_CACHE_MAX_ENTRIES * 3 // 4):]
+    
+    vectors = cache_index.reconstruct_n(0, cache_index.ntotal)[keep]
+    new_index = faiss.IndexFlatIP(cache_index.d)
+    if keep:
+        new_index.add(vectors)
+    cache_index = new_index
+    cache_answers[:] = [cache_answers[i] for i in keep]
+    cache_timestamps[:] = [cache_timestamps[i] for i in keep]
+    logger.info(f"Evicted semantic cache down to {len(keep)} entries")
+
+def add_to_semantic_cache(query_vector: np.ndarray, answer: str, generation: int):
+    """Store an answer under its question embedding, unless the document has since changed."""
+    global cache_index
+    with cache_lock:
+        if generation != cache_generation:
+            return
+        if cache_index is None:
+            cache_index = faiss.IndexFlatIP(query_vector.shape[1])
+        elif cache_index.ntotal >= SEMANTIC_CACHE_MAX_ENTRIES:
+            _evict_semantic_cache()
+        cache_index.add(query_vector)
+        cache_answers.append(answer)
+        cache_timestamps.append(time.time())
+
+@lru_cache(maxsize=512)
+def _embed_query(text: str) -> tuple:
+    """Embed query text once; repeated questions reuse the cached vector."""
+    return tuple(embeddings.embed_query(text))
+
+def embed_question(question: str) -> np.ndarray:
+    """Embed a question as a normalized (1, d) matrix for cosine search."""
+    query_vector = np.asarray([_embed_query(question)], dtype="float32")
+    faiss.normalize_L2(query_vector)
+    return query_vector
 
 # 2. Document Chunking & Ingestion 
-def ingest_pdf(file_path: str):
+def load_pdf_bytes(file_bytes: bytes, source: str) -> List[Document]:
+    """Parse an in-memory PDF into one Document per page, like PyMuPDFLoader."""
+    with fitz.open(stream=file_bytes, filetype="pdf") as pdf:
+        return [
+            Document(
+                page_content=page.get_text(),
+                metadata={"source": source, "page": page.number, "total_pages": pdf.page_count}
+            )
+            for page in pdf
+        ]
+
+def ingest_pdf(file_path: Optional[str] = None, file_bytes: Optional[bytes] = None, source: Optional[str] = None):
+    """Ingest a PDF from a path on disk or from raw bytes."""
     global vector_store
-    logger.info(f"Processing PDF: {file_path}")
+    source = source or file_path
+    logger.info(f"Processing PDF: {source}")
     
     try:
-        loader = PyPDFLoader(file_path)
-        docs = loader.load()
+        if file_bytes is not None:
+            docs = load_pdf_bytes(file_bytes, source)
+        elif file_path is not None:
+            docs = PyMuPDFLoader(file_path).load()
+        else:
+            raise ValueError("Either file_path or file_bytes is required")
         logger.info(f"Loaded {len(docs)} pages from PDF")
         
-        # Split text into chunks
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000, 
-            chunk_overlap=200,
-            length_function=len,
+        # Split text into chunks measured in embedding-model tokens
+        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+            encoding_name="cl100k_base",  # Tokenizer of the Azure OpenAI embedding models
+            chunk_size=512, 
+            chunk_overlap=64,
             separators=["\n\n", "\n", " ", ""]
         )
         splits = text_splitter.split_documents(docs)
@@ -71,11 +195,43 @@ def ingest_pdf(file_path: str):
         
         # 3. Store in FAISS
         logger.info("Creating Embeddings and Storing in FAISS...")
-        vector_store = FAISS.from_documents(documents=splits, embedding=embeddings)
+        texts = [split.page_content for split in splits]
+        
+        # Embed all chunks up front; the client batches them into few Azure requests
+        vectors = embeddings.embed_documents(texts)
+        logger.info(f"Embedded {len(vectors)} chunks")
+        
+        with ingest_lock:
+            # Build HNSW over int8 scalar-quantized vectors directly, without an
+            # intermediate FP32 flat index: sublinear search at a quarter of the memory
+            vector_matrix = np.asarray(vectors, dtype="float32")
+            hnsw_index = faiss.IndexHNSWSQ(
+                vector_matrix.shape[1], faiss.ScalarQuantizer.QT_8bit, HNSW_M
+            )
+            hnsw_index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            hnsw_index.train(vector_matrix)
+            hnsw_index.add(vector_matrix)
+            
+            doc_ids = [str(uuid.uuid4()) for _ in splits]
+            store = FAISS(
+                embedding_function=embeddings,
+                index=hnsw_index,
+                docstore=InMemoryDocstore(dict(zip(doc_ids, splits))),
+                index_to_docstore_id=dict(enumerate(doc_ids))
+            )
+            logger.info(f"Built HNSW index over {hnsw_index.ntotal} vectors")
+            
+            # Save vector store for persistence
+            save_vector_store(store)
+            logger.info(f"Vector store saved to {vector_store_path}")
+            
+            # Answers cached for the previous document no longer apply;
+            # publish the new store only once the caches are cleared
+            _embed_query.cache_clear()
+            with cache_lock:
+                reset_semantic_cache()
+                vector_store = store
         
-        # Save vector store for persistence
-        vector_store.save_local(vector_store_path)
-        logger.info(f"Vector store saved to {vector_store_path}")
         logger.info("Ingestion Complete.")
         
         return len(splits)
@@ -83,9 +239,44 @@ def ingest_pdf(file_path: str):
         logger.error(f"Error during PDF ingestion: {str(e)}")
         raise
 
+# Persist vector store atomically
+def save_vector_store(store: FAISS):
+    """
+    Save to a fresh temporary directory, then swap whole directories with renames:
+    the live index moves to '.old' and the new one takes its place. A crash between
+    the two renames is repaired by recover_vector_store_dir on the next load.
+    """
+    old_path = vector_store_path + ".old"
+    tmp_path = tempfile.mkdtemp(
+        prefix=os.path.basename(vector_store_path) + ".tmp",
+        dir=os.path.dirname(os.path.abspath(vector_store_path))
+    )
+    try:
+        store.save_local(tmp_path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(vector_store_path):
+            os.replace(vector_store_path, old_path)
+        os.replace(tmp_path, vector_store_path)
+        shutil.rmtree(old_path, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+def recover_vector_store_dir():
+    """Restore '.old' if a save died mid-swap, and drop leftover temp directories."""
+    old_path = vector_store_path + ".old"
+    if os.path.exists(old_path):
+        if os.path.exists(vector_store_path):
+            shutil.rmtree(old_path, ignore_errors=True)
+        else:
+            logger.warning(f"Restoring vector store from {old_path} after interrupted save")
+            os.replace(old_path, vector_store_path)
+    for tmp_path in glob.glob(vector_store_path + ".tmp*"):
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
 # Load existing vector store on startup
 def load_vector_store():
     global vector_store
+    recover_vector_store_dir()
     if os.path.exists(vector_store_path):
         try:
             vector_store = FAISS.load_local(
@@ -93,6 +284,17 @@ def load_vector_store():
                 embeddings,
                 allow_dangerous_deserialization=True
             )
+            # Swap in a memory-mapped index where faiss supports mapping the codes
+            # (IO_FLAG_MMAP_IFC), so the in-memory copy is freed and pages load on demand
+            mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+            if mmap_flag is not None:
+                try:
+                    vector_store.index = faiss.read_index(
+                        os.path.join(vector_store_path, "index.faiss"),
+                        mmap_flag | faiss.IO_FLAG_READ_ONLY
+                    )
+                except Exception as e:
+                    logger.warning(f"Memory-mapped load failed, keeping in-memory index: {str(e)}")
             logger.info(f"Loaded existing vector store from {vector_store_path}")
             return True
         except Exception as e:
@@ -101,17 +303,19 @@ def load_vector_store():
     return False
 
 # 4. Retrieval Logic (The Tool)
-def retrieval_tool(query: str, k: int = 5) -> List[Document]:
+def retrieval_tool(query: str, k: int = 5) -> List[Tuple[Document, float]]:
     """
-    Retrieves top-k most relevant document chunks.
+    Retrieves top-k most relevant document chunks with their squared L2 distances
+    (computed by faiss against the int8-decoded stored vectors).
     Increased k from 3 to 5 for better coverage.
     """
     if not vector_store:
         raise ValueError("Vector store not initialized. Upload a PDF first.")
     
     logger.info(f"Retrieving top-{k} chunks for query: {query[:50]}...")
-    retriever = vector_store.as_retriever(search_kwargs={"k": k})
-    docs = retriever.invoke(query)
+    if hasattr(vector_store.index, "hnsw"):
+        vector_store.index.hnsw.efSearch = max(HNSW_EF_SEARCH, k)
+    docs = vector_store.similarity_search_with_score_by_vector(list(_embed_query(query)), k=k)
     logger.info(f"Retrieved {len(docs)} documents")
     
     return docs
@@ -120,24 +324,59 @@ def retrieval_tool(query: str, k: int = 5) -> List[Document]:
 
 # A. The Critic (Self-Reflection)
 # Checks if retrieved documents are relevant to the query.
-class Grade(BaseModel):
-    binary_score: str = Field(description="Relevance score 'yes' or 'no'")
+# Each batch of chunks is graded in a single LLM call.
+class GradeBatch(BaseModel):
+    scores: List[str] = Field(description="Relevance score 'yes' or 'no' for each chunk, in order")
 
-parser = JsonOutputParser(pydantic_object=Grade)
+parser = JsonOutputParser(pydantic_object=GradeBatch)
+FORMAT_INSTRUCTIONS = parser.get_format_instructions()
 
 critic_prompt = ChatPromptTemplate.from_template(
-    """You are a grader assessing relevance of a retrieved document to a user question.
-    Here is the retrieved document:
-    \n\n {context} \n\n
+    """You are a grader assessing relevance of retrieved documents to a user question.
+    Here are the retrieved documents:
+    \n\n {chunks} \n\n
     Here is the user question: {question}
     
-    If the document contains keywords or semantic meaning related to the user question, grade it as relevant.
-    Give a binary score 'yes' or 'no' score to indicate whether the document is relevant to the question.
+    If a document contains keywords or semantic meaning related to the user question, grade it as relevant.
+    For each document, in order, give a binary score 'yes' or 'no' to indicate whether it is relevant to the question.
+    Return exactly one score per document.
     
     {format_instructions}"""
 )
 
-critic_chain = critic_prompt | llm | parser
+critic_chain = critic_prompt.partial(format_instructions=FORMAT_INSTRUCTIONS) | llm | parser
+
+def format_chunks(docs: List[Document]) -> str:
+    """Enumerate chunks for the batched critic prompt."""
+    return "\n\n".join(
+        f"Chunk {i}: {doc.page_content}" for i, doc in enumerate(docs, 1)
+    )
+
+# Stop grading once this many chunks have been judged relevant
+MIN_RELEVANT = 3
+
+# Chunks closer than this squared L2 distance are accepted without asking the critic.
+# For unit-norm embeddings squared L2 = 2 - 2 * cosine, so 0.3 means cosine >= ~0.85
+# (approximate, since stored vectors are int8-quantized).
+HIGH_CONF_THRESHOLD = 0.3
+
+async def grade_chunks(docs: List[Document], question: str) -> List[str]:
+    """
+    Grade chunks with one critic call.
+    Returns one lowercase score per chunk; chunks left unscored are marked 'error'.
+    """
+    if not docs:
+        return []
+    try:
+        grade = await critic_chain.ainvoke({
+            "chunks": format_chunks(docs), 
+            "question": question
+        })
+        scores = [str(score).lower() for score in grade['scores']][:len(docs)]
+    except Exception as e:
+        logger.error(f"Error evaluating chunks: {str(e)}")
+        scores = []
+    return scores + ["error"] * (len(docs) - len(scores))
 
 # B. The Generator (Final Answer)
 generator_prompt = ChatPromptTemplate.from_template(
@@ -154,12 +393,12 @@ generator_prompt = ChatPromptTemplate.from_template(
 generator_chain = generator_prompt | llm
 
 # Agent Control Loop with Enhanced Logging
-def run_agentic_rag(question: str, debug: bool = False) -> Dict:
+async def run_agentic_rag(question: str, debug: bool = False) -> AsyncIterator[Dict]:
     """
     Run the agentic RAG pipeline with optional debug information.
     
-    Returns:
-        Dict with 'answer' and optional 'debug_info'
+    Yields:
+        Dicts with an answer 'delta', then a final dict with 'done' and optional 'debug_info'
     """
     logger.info(f"🤖 Agent received: {question}")
     
@@ -167,45 +406,81 @@ def run_agentic_rag(question: str, debug: bool = False) -> Dict:
         "total_retrieved": 0,
         "relevant_chunks": 0,
         "chunk_scores": [],
+        "auto_accepted": 0,
+        "cache_hit": False,
         "timestamp": datetime.now().isoformat()
     }
     
+    # Step 0: Semantic Cache - reuse the answer of a near-duplicate question
+    query_vector = None
+    with cache_lock:
+        cache_gen = cache_generation
+    if vector_store:
+        try:
+            # Embedding is a blocking Azure call; keep it off the event loop
+            query_vector = await asyncio.to_thread(embed_question, question)
+            cached_answer = lookup_semantic_cache(query_vector)
+            if cached_answer is not None:
+                debug_info["cache_hit"] = True
+                yield {"delta": cached_answer}
+                yield {"done": True, "debug_info": debug_info if debug else None}
+                return
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {str(e)}")
+    
     # Step 1: Tool Calling (Retrieval)
     logger.info("🔍 Calling Retrieval Tool...")
     try:
-        docs = retrieval_tool(question, k=5)  # Increased from 3 to 5
+        # Query embedding and FAISS search run in the thread pool
+        docs_and_distances = await asyncio.to_thread(retrieval_tool, question, 5)  # Increased from 3 to 5
+        docs = [doc for doc, _ in docs_and_distances]
         debug_info["total_retrieved"] = len(docs)
     except ValueError as e:
         logger.error(f"Retrieval failed: {str(e)}")
-        return {
-            "answer": "System not ready. Please upload a PDF first.",
-            "debug_info": debug_info if debug else None
-        }
+        yield {"delta": "System not ready. Please upload a PDF first."}
+        yield {"done": True, "debug_info": debug_info if debug else None}
+        return
 
     # Step 2: Self-Reflection (Critic)
     valid_context = []
     
-    logger.info("Critic evaluating retrieved chunks...")
-    for i, doc in enumerate(docs, 1):
-        try:
-            grade = critic_chain.invoke({
-                "context": doc.page_content, 
-                "question": question,
-                "format_instructions": parser.get_format_instructions()
-            })
-            
-            score = grade['binary_score'].lower()
-            debug_info["chunk_scores"].append(score)
-            
-            if score == 'yes':
-                logger.info(f"Chunk {i}/{len(docs)}: RELEVANT")
-                valid_context.append(doc.page_content)
-                debug_info["relevant_chunks"] += 1
-            else:
-                logger.info(f"Chunk {i}/{len(docs)}: NOT RELEVANT")
-        except Exception as e:
-            logger.error(f"Error evaluating chunk {i}: {str(e)}")
-            debug_info["chunk_scores"].append("error")
+    # Confidently close chunks skip the critic; only borderline ones are graded
+    confident = [distance < HIGH_CONF_THRESHOLD for _, distance in docs_and_distances]
+    borderline = [doc for doc, is_confident in zip(docs, confident) if not is_confident]
+    debug_info["auto_accepted"] = sum(confident)
+    needed = MIN_RELEVANT - sum(confident)
+    
+    logger.info(f"Critic evaluating {len(borderline)} borderline chunks...")
+    if needed <= 0:
+        critic_scores = ["skipped"] * len(borderline)
+    else:
+        # Grade the top-ranked chunks first; only send the rest to the critic if too
+        # few passed. Trades an extra round trip on a miss for fewer critic tokens.
+        critic_scores = await grade_chunks(borderline[:needed], question)
+        if critic_scores.count("yes") < needed:
+            critic_scores += await grade_chunks(borderline[needed:], question)
+        else:
+            logger.info(f"Found {MIN_RELEVANT} relevant chunks, not grading the rest")
+            critic_scores += ["skipped"] * (len(borderline) - len(critic_scores))
+    
+    critic_iter = iter(critic_scores)
+    scores = ["auto" if is_confident else next(critic_iter) for is_confident in confident]
+    
+    for i, (doc, score) in enumerate(zip(docs, scores), 1):
+        debug_info["chunk_scores"].append(score)
+        
+        if score == 'auto':
+            logger.info(f"Chunk {i}/{len(docs)}: RELEVANT (high retrieval score)")
+            valid_context.append(doc.page_content)
+            debug_info["relevant_chunks"] += 1
+        elif score == 'yes':
+            logger.info(f"Chunk {i}/{len(docs)}: RELEVANT")
+            valid_context.append(doc.page_content)
+            debug_info["relevant_chunks"] += 1
+        elif score == 'skipped':
+            logger.info(f"Chunk {i}/{len(docs)}: SKIPPED")
+        else:
+            logger.info(f"Chunk {i}/{len(docs)}: NOT RELEVANT")
 
     # Log summary
     logger.info(f"📊 Kept {len(valid_context)}/{len(docs)} chunks after reflection")
@@ -215,57 +490,90 @@ def run_agentic_rag(question: str, debug: bool = False) -> Dict:
         logger.warning("No relevant documents found. Trying broader retrieval...")
         try:
             # Try retrieving more documents (up to 10)
-            docs_extended = retrieval_tool(question, k=10)
+            docs_extended = await asyncio.to_thread(retrieval_tool, question, 10)
             debug_info["total_retrieved"] = len(docs_extended)
+            new_docs = [doc for doc, _ in docs_extended[5:]]  # Check new docs only
             
-            for i, doc in enumerate(docs_extended[5:], len(docs)+1):  # Check new docs only
-                try:
-                    grade = critic_chain.invoke({
-                        "context": doc.page_content, 
-                        "question": question,
-                        "format_instructions": parser.get_format_instructions()
-                    })
-                    
-                    score = grade['binary_score'].lower()
-                    debug_info["chunk_scores"].append(score)
-                    
-                    if score == 'yes':
-                        logger.info(f"Extended Chunk {i}: RELEVANT")
-                        valid_context.append(doc.page_content)
-                        debug_info["relevant_chunks"] += 1
-                except Exception as e:
-                    logger.error(f"Error in extended evaluation: {str(e)}")
+            scores = await grade_chunks(new_docs, question)
+            
+            for i, (doc, score) in enumerate(zip(new_docs, scores), len(docs)+1):
+                debug_info["chunk_scores"].append(score)
+                
+                if score == 'yes':
+                    logger.info(f"Extended Chunk {i}: RELEVANT")
+                    valid_context.append(doc.page_content)
+                    debug_info["relevant_chunks"] += 1
         except Exception as e:
             logger.error(f"Extended retrieval failed: {str(e)}")
     
     # Step 4: Final Decision & Generation
     if not valid_context:
         logger.warning("No relevant documents found after extended search")
-        return {
-            "answer": "I'm sorry, but the provided document does not contain information relevant to your question. Please try rephrasing your question or upload a different document.",
-            "debug_info": debug_info if debug else None
-        }
+        yield {"delta": "I'm sorry, but the provided document does not contain information relevant to your question. Please try rephrasing your question or upload a different document."}
+        yield {"done": True, "debug_info": debug_info if debug else None}
+        return
     
     logger.info("Generating Final Answer...")
     formatted_context = "\n\n".join(valid_context)
     
+    answer_parts = []
     try:
-        response = generator_chain.invoke({
+        async for chunk in generator_chain.astream({
             "context": formatted_context, 
             "question": question
-        })
+        }):
+            if chunk.content:
+                answer_parts.append(chunk.content)
+                yield {"delta": chunk.content}
         
         logger.info("Answer generated successfully")
-        return {
-            "answer": response.content,
-            "debug_info": debug_info if debug else None
-        }
+        if query_vector is not None:
+            add_to_semantic_cache(query_vector, "".join(answer_parts), cache_gen)
     except Exception as e:
         logger.error(f"Error generating answer: {str(e)}")
-        return {
-            "answer": "An error occurred while generating the answer. Please try again.",
-            "debug_info": debug_info if debug else None
-        }
+        yield {"delta": "An error occurred while generating the answer. Please try again."}
+    
+    yield {"done": True, "debug_info": debug_info if debug else None}
+
+# Streaming Helpers
+STREAM_FLUSH_INTERVAL = 0.05  # Seconds between flushes of buffered deltas
+STREAM_FLUSH_CHUNKS = 32  # Max streamed LLM chunks buffered before a flush
+
+def sse_event(payload: Dict) -> str:
+    """Format a payload as a server-sent event."""
+    return f"data: {json.dumps(payload)}\n\n"
+
+async def stream_answer(events: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    """
+    Encode pipeline events as server-sent events.
+    Answer deltas are buffered and flushed every STREAM_FLUSH_INTERVAL seconds
+    or STREAM_FLUSH_CHUNKS streamed chunks to avoid per-chunk overhead.
+    """
+    buffer = []
+    last_flush = time.monotonic()
+    try:
+        async for event in events:
+            if "delta" in event:
+                buffer.append(event["delta"])
+                if (len(buffer) < STREAM_FLUSH_CHUNKS
+                        and time.monotonic() - last_flush < STREAM_FLUSH_INTERVAL):
+                    continue
+                event = {"delta": "".join(buffer)}
+                buffer.clear()
+            elif buffer:
+                yield sse_event({"delta": "".join(buffer)})
+                buffer.clear()
+            
+            last_flush = time.monotonic()
+            yield sse_event(event)
+        
+        if buffer:
+            yield sse_event({"delta": "".join(buffer)})
+    except Exception as e:
+        logger.error(f"Error while streaming answer: {str(e)}")
+        if buffer:
+            yield sse_event({"delta": "".join(buffer)})
+        yield sse_event({"error": str(e)})
 
 # 6. API Implementation
 app = FastAPI(title="Azure Agentic RAG API")
@@ -277,6 +585,11 @@ class QueryRequest(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     """Load vector store on startup if it exists"""
+    # Size the default executor used for offloaded blocking work
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(
+        ThreadPoolExecutor(max_workers=int(os.getenv("THREAD_POOL_SIZE", 16)))
+    )
     load_vector_store()
     logger.info(" Server started")
 
@@ -286,36 +599,27 @@ async def upload_document(file: UploadFile):
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     
-    # Save temp file
-    temp_filename = f"temp_{file.filename}"
     try:
-        with open(temp_filename, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
+        # Parse straight from memory - no temp file round trip
+        content = await file.read()
         logger.info(f"Processing uploaded file: {file.filename}")
         
-        # Trigger Ingestion
-        num_chunks = ingest_pdf(temp_filename)
-        
-        # Cleanup
-        os.remove(temp_filename)
-        logger.info(f"Cleaned up temporary file: {temp_filename}")
+        # Trigger Ingestion off the event loop so /chat and /health stay responsive
+        num_chunks = await asyncio.to_thread(
+            ingest_pdf, file_bytes=content, source=file.filename
+        )
         
         return {
             "message": "PDF processed and vector store ready.",
             "chunks_created": num_chunks
         }
     except Exception as e:
-        # Cleanup on error
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
         logger.error(f"Error processing upload: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
 
 @app.post("/chat")
 async def chat_endpoint(request: QueryRequest):
-    """Chat endpoint for asking questions"""
+    """Chat endpoint for asking questions, streamed as server-sent events"""
     if not vector_store:
         raise HTTPException(
             status_code=400, 
@@ -324,12 +628,11 @@ async def chat_endpoint(request: QueryRequest):
     
     logger.info(f"Received question: {request.question}")
     
-    try:
-        result = run_agentic_rag(request.question, debug=request.debug)
-        return result
-    except Exception as e:
-        logger.error(f"Error in chat endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Errors raised while streaming are reported as {"error": ...} events by stream_answer
+    return StreamingResponse(
+        stream_answer(run_agentic_rag(request.question, debug=request.debug)),
+        media_type="text/event-stream"
+    )
 
 @app.get("/health")
 async def health_check():